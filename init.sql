@@ -15,6 +15,35 @@ CREATE TABLE IF NOT EXISTS profiles (
 
 ALTER TABLE profiles ADD COLUMN IF NOT EXISTS gender TEXT;
 ALTER TABLE profiles ADD COLUMN IF NOT EXISTS gender_filter TEXT;
+ALTER TABLE profiles ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- Поиск по анкетам: полнотекстовый по городу/описанию/предпочтениям, триграммный по названиям городов
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Единственное определение search_vector: используется при бэкфилле и в upsert бота
+CREATE OR REPLACE FUNCTION profile_search_vector(city TEXT, description TEXT, preference TEXT)
+RETURNS TSVECTOR LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector('russian', coalesce(city, '')), 'A') ||
+           setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+           setweight(to_tsvector('russian', coalesce(preference, '')), 'C')
+$$;
+
+UPDATE profiles SET search_vector = profile_search_vector(city, description, preference)
+WHERE search_vector IS NULL;
+CREATE INDEX IF NOT EXISTS idx_profiles_search_vector ON profiles USING GIN (search_vector);
+
+-- Справочник городов для исправления опечаток: различных городов мало, а у каждого
+-- десятки тысяч анкет, поэтому триграммный индекс по profiles.city слишком тяжёлый.
+-- Пополняется тем же upsert'ом в боте, что и search_vector.
+CREATE TABLE IF NOT EXISTS cities (
+    name TEXT PRIMARY KEY
+);
+INSERT INTO cities (name)
+SELECT DISTINCT city FROM profiles WHERE city IS NOT NULL
+ON CONFLICT DO NOTHING;
+DROP INDEX IF EXISTS idx_profiles_city_trgm;
+CREATE INDEX IF NOT EXISTS idx_cities_name_trgm ON cities USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_profiles_city_id ON profiles (city, id);
 
 
 CREATE TABLE IF NOT EXISTS likes (
@@ -26,3 +55,62 @@ CREATE TABLE IF NOT EXISTS likes (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 CREATE INDEX IF NOT EXISTS idx_likes_to_user_id ON likes (to_user_id);
+
+
+-- Ранжированный поиск анкет.
+-- Ищем полнотекстово (город входит в search_vector с весом A, поэтому «Москва йога»
+-- требует оба слова). Триграммы — только запасной путь для опечаток в городе: если
+-- полнотекстовых кандидатов не осталось, каждое слово запроса сравнивается с городом,
+-- а точное совпадение с городом не считается опечаткой.
+-- Ранжируются не все совпадения, а 500 самых новых анкет (по id): ранжировать сотни
+-- тысяч строк для частого слова слишком дорого. Это осознанный компромисс по релевантности:
+-- для частого слова старая анкета с лучшим ts_rank_cd может не попасть в выдачу.
+-- viewer_id = NULL — поиск без исключения себя и уже просмотренных (API):
+-- сравнения с NULL ничего не отсекают, а NOT EXISTS остаётся anti join'ом.
+CREATE OR REPLACE FUNCTION search_profiles(
+    query TEXT, viewer_id BIGINT, viewer_gender_filter TEXT, max_results INTEGER
+)
+RETURNS TABLE (
+    user_id BIGINT, name TEXT, age INTEGER, city TEXT,
+    description TEXT, preference TEXT, photo_id TEXT, rank REAL
+)
+LANGUAGE sql STABLE AS $$
+    WITH fts AS (
+        SELECT p.*, coalesce(ts_rank_cd(p.search_vector, websearch_to_tsquery('russian', query)), 0) AS rank
+        FROM profiles p
+        WHERE p.search_vector @@ websearch_to_tsquery('russian', query)
+          AND (viewer_gender_filter = 'all' OR p.gender = viewer_gender_filter)
+          AND p.user_id IS DISTINCT FROM viewer_id
+          AND NOT EXISTS (
+              SELECT 1 FROM likes l WHERE l.from_user_id = viewer_id AND l.to_user_id = p.user_id
+          )
+        ORDER BY p.id DESC
+        LIMIT 500
+    ),
+    fuzzy_cities AS (
+        SELECT c.name, max(similarity(c.name, w)) AS rank
+        FROM cities c, unnest(regexp_split_to_array(trim(query), '\s+')) AS w
+        WHERE NOT EXISTS (SELECT 1 FROM fts)
+          AND c.name % w
+          AND lower(c.name) <> lower(w)
+        GROUP BY c.name
+    ),
+    fuzzy AS (
+        SELECT p.*, fc.rank
+        FROM fuzzy_cities fc, LATERAL (
+            SELECT p.* FROM profiles p
+            WHERE p.city = fc.name
+              AND (viewer_gender_filter = 'all' OR p.gender = viewer_gender_filter)
+              AND p.user_id IS DISTINCT FROM viewer_id
+              AND NOT EXISTS (
+                  SELECT 1 FROM likes l WHERE l.from_user_id = viewer_id AND l.to_user_id = p.user_id
+              )
+            ORDER BY p.id DESC
+            LIMIT 500
+        ) AS p
+    )
+    SELECT c.user_id, c.name, c.age, c.city, c.description, c.preference, c.photo_id, c.rank::REAL
+    FROM (SELECT * FROM fts UNION ALL SELECT * FROM fuzzy) AS c
+    ORDER BY c.rank DESC, c.id DESC
+    LIMIT max_results
+$$;
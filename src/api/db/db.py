@@ -19,5 +19,13 @@ class UserDB:
             """, user_id, user.name, user.photo_url, user.age, user.city, user.description,
                  user.age_filter[0], user.age_filter[1], user.gender, user.gender_filter)
 
+    @classmethod
+    async def search_profiles(cls, query: str, limit: int = 20):
+        # Ранжирование и отбор кандидатов — в функции search_profiles (init.sql)
+        async with cls.pool.acquire() as conn:
+            return await conn.fetch(
+                "SELECT * FROM search_profiles($1, NULL, 'all', $2)", query, limit
+            )
+
 async def init_db():
     await UserDB.init()
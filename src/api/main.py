@@ -1,11 +1,12 @@
 from fastapi import FastAPI
-from api.routes import users, upload
+from api.routes import users, upload, profiles
 from api.db.db import init_db
 
 app = FastAPI()
 
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(upload.router, prefix="/upload", tags=["Upload"])
+app.include_router(profiles.router, prefix="/profiles", tags=["Profiles"])
 
 @app.on_event("startup")
 async def on_startup():
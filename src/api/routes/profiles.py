@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Query
+from api.db.db import UserDB
+
+router = APIRouter()
+
+@router.get("/search")
+async def search_profiles(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Полнотекстовый поиск по городу, описанию и предпочтениям.
+
+    Ранжируются только 500 самых новых совпадений, а не все. Если полнотекстовых
+    совпадений нет, ищутся анкеты с похожим на слово запроса городом (опечатки).
+    """
+    rows = await UserDB.search_profiles(q, limit)
+    return {"results": [dict(row) for row in rows]}
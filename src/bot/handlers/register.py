@@ -47,6 +47,21 @@ def get_filter_buttons():
          InlineKeyboardButton(text="Всех", callback_data="filter_all")]
     ])
 
+# --- Profile card ---
+
+async def send_profile_card(message: Message, profile, reply_markup: InlineKeyboardMarkup = None):
+    caption = (
+        f"<b>{profile['name']}, {profile['age']}</b>\n"
+        f"{profile['city']} — {profile['description']}\n"
+        f"<i>Ищет:</i> {profile['preference']}"
+    )
+    await message.answer_photo(
+        photo=profile["photo_id"],
+        caption=caption,
+        reply_markup=reply_markup,
+        parse_mode="HTML"
+    )
+
 # --- Async Resource Initialization ---
 
 async def init_resources(database_url: str):
@@ -107,17 +122,7 @@ async def get_and_send_profile(message: Message, gender_filter: str):
                 await incoming_msg.reject(requeue=False)
                 await get_and_send_profile(message, gender_filter)
                 return
-            caption = (
-                f"<b>{profile_data['name']}, {profile_data['age']}</b>\n"
-                f"{profile_data['city']} — {profile_data['description']}\n"
-                f"<i>Ищет:</i> {profile_data['preference']}"
-            )
-            await message.answer_photo(
-                photo=profile_data["photo_id"],
-                caption=caption,
-                reply_markup=get_swipe_buttons(profile_data["user_id"]),
-                parse_mode="HTML"
-            )
+            await send_profile_card(message, profile_data, get_swipe_buttons(profile_data["user_id"]))
             await incoming_msg.ack()
         except json.JSONDecodeError:
             await message.answer("⚠️ Получены некорректные данные профиля.")
@@ -130,6 +135,28 @@ async def get_and_send_profile(message: Message, gender_filter: str):
     except Exception as e:
         await message.answer(f"⚠️ Ошибка получения анкет из очереди: {e}")
 
+# --- Helper to get next profile matching a keyword search and send ---
+# Поиск — отдельный источник кандидатов, мимо очередей RabbitMQ: очереди profiles_* общие
+# для всех пользователей и читаются с ack, поэтому персональную ранжированную выдачу в них
+# не положить. Кандидат выбирается из profiles на каждом свайпе, уже просмотренные
+# исключаются по likes.
+
+async def get_and_send_search_profile(message: Message, user_id: int, gender_filter: str, search_query: str):
+    try:
+        async with db_pool.acquire() as conn:
+            profile = await conn.fetchrow(
+                "SELECT * FROM search_profiles($1, $2, $3, 1)", search_query, user_id, gender_filter
+            )
+    except Exception as e:
+        logger.error(f"Database error during search: {e}", exc_info=True)
+        await message.answer("⚠️ Ошибка поиска анкет. Пожалуйста, попробуй позже.")
+        return
+
+    if not profile:
+        await message.answer("По твоему запросу анкет больше нет 😢 Попробуй /search с другими словами или /browse")
+        return
+    await send_profile_card(message, profile, get_swipe_buttons(profile["user_id"]))
+
 # --- Registration Handlers ---
 
 @router.message(F.text == "/start")
@@ -238,14 +265,20 @@ async def get_filter(callback: CallbackQuery, state: FSMContext):
     try:
         conn = await db_pool.acquire()
         await conn.execute(
-            """INSERT INTO profiles
-               (user_id, name, age, city, description, preference, photo_id, gender, gender_filter, username)
-               VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10)
+            """WITH new_city AS (
+                   INSERT INTO cities (name) SELECT $4::text WHERE $4 IS NOT NULL
+                   ON CONFLICT DO NOTHING
+               )
+               INSERT INTO profiles
+               (user_id, name, age, city, description, preference, photo_id, gender, gender_filter, username,
+                search_vector)
+               VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,profile_search_vector($4,$5,$6))
                ON CONFLICT (user_id) DO UPDATE SET
                    name=EXCLUDED.name, age=EXCLUDED.age, city=EXCLUDED.city,
                    description=EXCLUDED.description, preference=EXCLUDED.preference,
                    photo_id=EXCLUDED.photo_id, gender=EXCLUDED.gender,
-                   gender_filter=EXCLUDED.gender_filter, username=EXCLUDED.username
+                   gender_filter=EXCLUDED.gender_filter, username=EXCLUDED.username,
+                   search_vector=EXCLUDED.search_vector
             """, user_id, data["name"], data["age"], data["city"],
             data["description"], data["preference"], data["photo_id"],
             data["gender"], gender_filter, callback.from_user.username
@@ -278,12 +311,7 @@ async def get_filter(callback: CallbackQuery, state: FSMContext):
         aio_pika.Message(body=profile_msg), routing_key="profiles_all"
     )
 
-    caption = (
-        f"<b>{data['name']}, {data['age']}</b>\n"
-        f"{data['city']} — {data['description']}\n"
-        f"<i>Ищет:</i> {data['preference']}"
-    )
-    await callback.message.answer_photo(photo=data["photo_id"], caption=caption, parse_mode="HTML")
+    await send_profile_card(callback.message, data)
     await callback.message.answer("Анкета готова! Попробуй /browse 💘")
     await state.clear()
     await callback.answer("Анкета сохранена!")
@@ -300,8 +328,14 @@ async def browse_profiles(message: Message, state: FSMContext):
             await state.clear()
             return
         gender_filter = user_data["gender_filter"]
-        await state.update_data(browse_filter=gender_filter)
-        await redis_client.hset(f"user:{user_id}", "current_action", f"browse_{gender_filter}")
+        # /browse может прийти посреди шага /search — выходим из него
+        await state.set_state(None)
+        await state.update_data(browse_filter=gender_filter, search_query=None)
+        await redis_client.hdel(f"user:{user_id}", "search_query")
+        await redis_client.hset(f"user:{user_id}", mapping={
+            "fsm_state": "registered",
+            "current_action": f"browse_{gender_filter}"
+        })
     finally:
         if conn:
             await db_pool.release(conn)
@@ -309,6 +343,54 @@ async def browse_profiles(message: Message, state: FSMContext):
     await message.answer("Ищем для тебя анкеты...")
     await get_and_send_profile(message, gender_filter)
 
+@router.message(F.text == "/search")
+async def start_search(message: Message, state: FSMContext):
+    user_id = message.from_user.id
+    conn = None
+    try:
+        conn = await db_pool.acquire()
+        user_data = await conn.fetchrow("SELECT gender_filter FROM profiles WHERE user_id = $1", user_id)
+    finally:
+        if conn:
+            await db_pool.release(conn)
+    if not user_data:
+        await message.answer("Сначала зарегистрируйся через /start 💡")
+        await state.clear()
+        return
+    await state.update_data(browse_filter=user_data["gender_filter"])
+    await message.answer("Напиши интересы или город, по которым искать анкеты (или /skip, чтобы смотреть всех):")
+    await state.set_state(RegistrationState.search_query)
+    await redis_client.hset(f"user:{user_id}", "fsm_state", RegistrationState.search_query.state)
+
+@router.message(RegistrationState.search_query)
+async def get_search_query(message: Message, state: FSMContext):
+    user_id = message.from_user.id
+    if not message.text:
+        await message.answer("Пожалуйста, напиши запрос текстом или /skip.")
+        return
+    search_query = message.text.strip()
+    if search_query != "/skip" and not 2 <= len(search_query) <= 200:
+        await message.answer("Пожалуйста, введи запрос длиной от 2 до 200 символов или /skip.")
+        return
+    data = await state.get_data()
+    gender_filter = data["browse_filter"]
+    await state.set_state(None)
+    await redis_client.hset(f"user:{user_id}", "fsm_state", "registered")
+    if search_query == "/skip":
+        await state.update_data(search_query=None)
+        await redis_client.hdel(f"user:{user_id}", "search_query")
+        await redis_client.hset(f"user:{user_id}", "current_action", f"browse_{gender_filter}")
+        await message.answer("Ищем для тебя анкеты...")
+        await get_and_send_profile(message, gender_filter)
+        return
+    await state.update_data(search_query=search_query)
+    await redis_client.hset(f"user:{user_id}", mapping={
+        "search_query": search_query,
+        "current_action": f"search_{gender_filter}"
+    })
+    await message.answer("Ищем анкеты по твоему запросу...")
+    await get_and_send_search_profile(message, user_id, gender_filter, search_query)
+
 @router.callback_query(F.data.startswith("like_") | F.data.startswith("dislike_"))
 async def handle_swipe(callback: CallbackQuery, bot: Bot, state: FSMContext):
     user_id = callback.from_user.id
@@ -351,7 +433,9 @@ async def handle_swipe(callback: CallbackQuery, bot: Bot, state: FSMContext):
 
     await callback.answer("Принято!")
     data = await state.get_data()
-    if data.get("browse_filter"):
+    if data.get("browse_filter") and data.get("search_query"):
+        await get_and_send_search_profile(callback.message, user_id, data["browse_filter"], data["search_query"])
+    elif data.get("browse_filter"):
         await get_and_send_profile(callback.message, data["browse_filter"])
     else:
         await callback.message.answer("Произошла ошибка, попробуйте /browse снова.")
\ No newline at end of file
@@ -11,3 +11,4 @@ class RegistrationState(StatesGroup):
     gender = State()
     gender_filter = State()
     filter_age = State()
+    search_query = State()